@@ -0,0 +1,20 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(path: Path, newline: str | None = None) -> Iterator[IO[str]]:
+    # Erst vollständig in eine Nachbardatei schreiben und auf die Platte bringen,
+    # dann atomar ersetzen: ein Abbruch hinterlässt nie eine halbe Zieldatei.
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with tmp_path.open("w", newline=newline, encoding="utf-8") as handle:
+            yield handle
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -1,103 +1,52 @@
-import csv
-from datetime import datetime
+import io
+import os
+from importlib import metadata
 from pathlib import Path
 
-import kaleido
-import plotly.graph_objects as go
-import plotly.io as pio
+import matplotlib
 
-DATA_PATH = Path("data.csv")
-OUTPUT_PATH = Path("docs/index.html")
+matplotlib.use("Agg")
 
+import matplotlib.dates as mdates  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
 
-def load_series(path: Path):
-    timestamps = []
-    total_values = []
-    rueweler_values: list[float | None] = []
-    with path.open(newline="") as handle:
-        reader = csv.reader(handle)
-        for row in reader:
-            if not row:
-                continue
-            timestamp = datetime.fromisoformat(row[0])
-            total_value = float(row[1])
-            rueweler_value: float | None = None
-            if len(row) >= 3 and row[2].strip():
-                try:
-                    rueweler_value = float(row[2])
-                except ValueError:
-                    rueweler_value = None
-            timestamps.append(timestamp)
-            total_values.append(total_value)
-            rueweler_values.append(rueweler_value)
-    if not timestamps:
-        raise ValueError("data.csv enthält keine Daten")
-    pairs = sorted(
-        zip(timestamps, total_values, rueweler_values), key=lambda item: item[0]
-    )
-    return (
-        [item[0] for item in pairs],
-        [item[1] for item in pairs],
-        [item[2] for item in pairs],
-    )
-
+from atomic_write import atomic_write  # noqa: E402
 
-def build_svg(timestamps, total_values) -> str:
-    fig = go.Figure(
-        data=[
-            go.Scatter(
-                x=timestamps,
-                y=total_values,
-                mode="lines",
-                name="Anmeldungen gesamt",
-                line=dict(color="#4f46e5", width=3),
-                hovertemplate="%{x|%d.%m.%Y %H:%M}<br>Gesamt: %{y}<extra></extra>",
-            )
-        ]
-    )
-    fig.update_layout(
-        margin=dict(l=40, r=20, t=10, b=40),
-        paper_bgcolor="white",
-        plot_bgcolor="white",
-        height=420,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    )
-    fig.update_xaxes(showgrid=False, title_text="Zeit")
-    fig.update_yaxes(showgrid=True, gridcolor="#e5e7eb", title_text="Anzahl")
+try:
+    from numba import njit  # noqa: E402
+except ImportError:
+    njit = None
 
-    try:
-        svg_bytes = pio.to_image(fig, format="svg")
-        return svg_bytes.decode("utf-8")
-    except Exception as exc:  # noqa: BLE001
-        print(
-            "Kaleido konnte kein SVG rendern, weiche auf Plotly.js aus:",
-            exc,
-        )
-        return pio.to_html(
-            fig, include_plotlyjs="cdn", full_html=False, config={"displaylogo": False}
-        )
+DATA_PATH = Path("data.csv")
+OUTPUT_PATH = Path("docs/index.html")
+# Plotly + Kaleido (Chrome) nur noch auf Wunsch, z. B. für die Hover-Vorlage.
+USE_PLOTLY = os.environ.get("USE_PLOTLY") == "1"
+# Mehr Punkte sind in einem 1100px breiten Diagramm nicht zu unterscheiden.
+MAX_CHART_POINTS = 500
 
 
-def build_html(total_current: float, rueweler_current: float, svg: str) -> str:
-    return f"""<!DOCTYPE html>
-<html lang=\"de\">
+# Das Template ändert sich nie, nur die drei Werte werden eingesetzt.
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="de">
 <head>
-  <meta charset=\"utf-8\" />
-  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\" />
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
   <title>Anmeldungen zum Paderborner Osterlauf 2026</title>
   <style>
-    :root {{
+    :root {
       color-scheme: light;
       font-family: "Inter", "Segoe UI", system-ui, -apple-system, sans-serif;
       background: #f3f4f6;
-    }}
-    body {{
+    }
+    body {
       margin: 0;
       padding: 32px 20px 48px;
       display: flex;
       justify-content: center;
-    }}
-    .dashboard {{
+    }
+    .dashboard {
       width: min(1100px, 100%);
       background: white;
       border-radius: 24px;
@@ -106,13 +55,13 @@ def build_html(total_current: float, rueweler_current: float, svg: str) -> str:
       display: flex;
       flex-direction: column;
       gap: 24px;
-    }}
-    .value-grid {{
+    }
+    .value-grid {
       display: grid;
       grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
       gap: 16px;
-    }}
-    .value-card {{
+    }
+    .value-card {
       border-radius: 18px;
       color: white;
       padding: 24px 24px 20px;
@@ -120,61 +69,64 @@ def build_html(total_current: float, rueweler_current: float, svg: str) -> str:
       display: flex;
       flex-direction: column;
       gap: 6px;
-    }}
-    .value-card h1 {{
+    }
+    .value-card h1 {
       margin: 0;
       font-size: clamp(2.2rem, 3vw, 3.4rem);
       font-weight: 700;
       letter-spacing: 0.02em;
-    }}
-    .value-card p {{
+    }
+    .value-card p {
       margin: 0;
       opacity: 0.9;
       font-size: 0.95rem;
-    }}
-    .value-card.total {{
+    }
+    .value-card.total {
       background: linear-gradient(135deg, #4f46e5, #6366f1);
       box-shadow: 0 16px 40px rgba(99, 102, 241, 0.3);
-    }}
-    .value-card.rueweler {{
+    }
+    .value-card.rueweler {
       background: linear-gradient(135deg, #10b981, #34d399);
       box-shadow: 0 16px 40px rgba(52, 211, 153, 0.28);
-    }}
-    .chart-card {{
+    }
+    .chart-card {
       background: #f9fafb;
       border-radius: 20px;
       padding: 16px;
       overflow: hidden;
-    }}
-    .chart-card svg {{
+    }
+    .chart-card svg {
       width: 100%;
       height: auto;
       display: block;
-    }}
-    @media (max-width: 640px) {{
-      .dashboard {{
+    }
+    @media (max-width: 640px) {
+      .dashboard {
         padding: 24px 16px 32px;
-      }}
-      .value-card {{
+      }
+      .value-card {
         padding: 20px;
-      }}
-    }}
+      }
+    }
   </style>
 </head>
 <body>
-  <main class=\"dashboard\">
-    <section class=\"value-grid\">
-      <article class=\"value-card total\">
+  <main class="dashboard">
+    <section class="value-grid">
+      <article class="value-card total">
         <p>Gesamt angemeldet</p>
-        <h1>{int(round(total_current))}</h1>
+        <h1>"""
+HTML_BETWEEN_VALUES = """</h1>
       </article>
-      <article class=\"value-card rueweler\">
+      <article class="value-card rueweler">
         <p>Rüweler aktuell</p>
-        <h1>{int(round(rueweler_current))}</h1>
+        <h1>"""
+HTML_BEFORE_CHART = """</h1>
       </article>
     </section>
-    <section class=\"chart-card\">
-      {svg}
+    <section class="chart-card">
+      """
+HTML_TAIL = """
     </section>
   </main>
 </body>
@@ -182,15 +134,241 @@ def build_html(total_current: float, rueweler_current: float, svg: str) -> str:
 """
 
 
+def kaleido_version() -> tuple[int, ...]:
+    try:
+        version = metadata.version("kaleido")
+    except metadata.PackageNotFoundError:
+        return (0,)
+    parts = []
+    for part in version.split(".")[:2]:
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+    return tuple(parts)
+
+
+def start_kaleido() -> bool:
+    try:
+        import kaleido
+    except ImportError:
+        # build_plotly_svg weicht dann selbst auf Plotly.js aus.
+        return False
+
+    # Kaleido >= 1.1 kann einen Chrome-Prozess für alle to_image-Aufrufe
+    # offenhalten; ältere Versionen (0.2.x) cachen ihren Prozess selbst.
+    if kaleido_version() < (1, 1):
+        return False
+    try:
+        # Ohne Chrome würde der Server-Thread sterben und to_image hängen;
+        # Kaleido() prüft den Browserpfad, ohne Chrome zu starten.
+        kaleido.Kaleido()
+    except Exception as exc:  # noqa: BLE001
+        print("Kaleido-Server nicht verfügbar:", exc)
+        return False
+    kaleido.start_sync_server(silence_warnings=True)
+    return True
+
+
+def stop_kaleido() -> None:
+    import kaleido
+
+    kaleido.stop_sync_server(silence_warnings=True)
+
+
+def load_series(path: Path):
+    frame = pd.read_csv(path, header=None, names=["timestamp", "total", "rueweler"])
+    if frame.empty:
+        raise ValueError("data.csv enthält keine Daten")
+    # parse_dates lässt gemischte ISO-Formate stillschweigend als Strings stehen;
+    # explizit geparst schlägt fehlerhafte Eingabe dagegen laut fehl.
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], format="ISO8601")
+    frame["total"] = frame["total"].astype(float)
+    if frame["total"].isna().any():
+        raise ValueError("data.csv enthält Zeilen ohne Gesamtzahl")
+    frame["rueweler"] = pd.to_numeric(frame["rueweler"], errors="coerce")
+    # scrape.py hängt nur an, die Datei ist also im Normalfall schon sortiert.
+    if not frame["timestamp"].is_monotonic_increasing:
+        frame = frame.sort_values("timestamp", kind="stable")
+    return (
+        frame["timestamp"].to_numpy(),
+        frame["total"].to_numpy(),
+        frame["rueweler"].to_numpy(dtype=float),
+    )
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: erster und letzter Punkt bleiben, aus jedem
+    # inneren Bucket wird der Punkt mit der größten Dreiecksfläche gewählt.
+    # Die Bucket-Mittelwerte kommen aus Präfixsummen (np.cumsum summiert
+    # sequenziell), damit lttb_loop bitgenau dieselben Werte und damit auch
+    # bei Plateaus dieselben Punkte erhält.
+    n = len(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sum_x = np.cumsum(x)
+    sum_y = np.cumsum(y)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_end = edges[bucket + 2]
+            avg_x = (sum_x[next_end - 1] - sum_x[end - 1]) / (next_end - end)
+            avg_y = (sum_y[next_end - 1] - sum_y[end - 1]) / (next_end - end)
+        else:
+            avg_x = x[-1]
+            avg_y = y[-1]
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def lttb_loop(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    # Dieselbe Auswahl wie lttb_indices, aber als skalare Schleifen für Numba.
+    n = x.shape[0]
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sum_x = np.cumsum(x)
+    sum_y = np.cumsum(y)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[n_out - 1] = n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start = edges[bucket]
+        end = edges[bucket + 1]
+        if bucket + 2 < n_out - 1:
+            next_end = edges[bucket + 2]
+            avg_x = (sum_x[next_end - 1] - sum_x[end - 1]) / (next_end - end)
+            avg_y = (sum_y[next_end - 1] - sum_y[end - 1]) / (next_end - end)
+        else:
+            avg_x = x[n - 1]
+            avg_y = y[n - 1]
+        best = start
+        best_area = -1.0
+        for i in range(start, end):
+            area = abs(
+                (x[previous] - avg_x) * (y[i] - y[previous])
+                - (x[previous] - x[i]) * (avg_y - y[previous])
+            )
+            if area > best_area:
+                best_area = area
+                best = i
+        previous = best
+        selected[bucket + 1] = best
+    return selected
+
+
+if njit is not None:
+    lttb_loop = njit(cache=True)(lttb_loop)
+
+
+def downsample(timestamps, values, n_out: int = MAX_CHART_POINTS):
+    if n_out < 3 or len(timestamps) <= n_out:
+        return timestamps, values
+    x = np.asarray(timestamps, dtype="datetime64[ns]").astype(np.int64)
+    x = (x - x[0]).astype(float)
+    y = np.asarray(values, dtype=float)
+    # Ohne Numba bleibt es bei der vektorisierten NumPy-Variante, die skalare
+    # Schleife wäre in reinem Python deutlich langsamer.
+    select = lttb_loop if njit is not None else lttb_indices
+    indices = select(x, y, n_out)
+    return timestamps[indices], values[indices]
+
+
+def build_svg(timestamps, total_values) -> str:
+    timestamps, total_values = downsample(timestamps, total_values)
+    if USE_PLOTLY:
+        return build_plotly_svg(timestamps, total_values)
+
+    with plt.rc_context({"svg.fonttype": "none", "svg.hashsalt": "osterlauf"}):
+        fig, ax = plt.subplots(figsize=(10, 4.2))
+        ax.plot(timestamps, total_values, color="#4f46e5", linewidth=3)
+        ax.set_xlabel("Zeit")
+        ax.set_ylabel("Anzahl")
+        ax.grid(axis="y", color="#e5e7eb")
+        ax.set_axisbelow(True)
+        ax.spines[["top", "right"]].set_visible(False)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d.%m."))
+        buffer = io.StringIO()
+        fig.savefig(buffer, format="svg", bbox_inches="tight", metadata={"Date": None})
+        plt.close(fig)
+    svg = buffer.getvalue()
+    # XML-Prolog und DOCTYPE gehören nicht in ein eingebettetes <svg>.
+    return svg[svg.index("<svg") :]
+
+
+def build_plotly_svg(timestamps, total_values) -> str:
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=timestamps,
+                y=total_values,
+                mode="lines",
+                name="Anmeldungen gesamt",
+                line=dict(color="#4f46e5", width=3),
+                hovertemplate="%{x|%d.%m.%Y %H:%M}<br>Gesamt: %{y}<extra></extra>",
+            )
+        ]
+    )
+    fig.update_layout(
+        margin=dict(l=40, r=20, t=10, b=40),
+        paper_bgcolor="white",
+        plot_bgcolor="white",
+        height=420,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    fig.update_xaxes(showgrid=False, title_text="Zeit")
+    fig.update_yaxes(showgrid=True, gridcolor="#e5e7eb", title_text="Anzahl")
+
+    try:
+        svg_bytes = pio.to_image(fig, format="svg")
+        return svg_bytes.decode("utf-8")
+    except Exception as exc:  # noqa: BLE001
+        print(
+            "Kaleido konnte kein SVG rendern, weiche auf Plotly.js aus:",
+            exc,
+        )
+        return pio.to_html(
+            fig, include_plotlyjs="cdn", full_html=False, config={"displaylogo": False}
+        )
+
+
+def build_html(total_current: float, rueweler_current: float, svg: str) -> str:
+    return "".join(
+        (
+            HTML_HEAD,
+            str(int(round(total_current))),
+            HTML_BETWEEN_VALUES,
+            str(int(round(rueweler_current))),
+            HTML_BEFORE_CHART,
+            svg,
+            HTML_TAIL,
+        )
+    )
+
+
 def main() -> None:
     timestamps, totals, rueweler_counts = load_series(DATA_PATH)
-    svg = build_svg(timestamps, totals)
-    rueweler_current = next(
-        (value for value in reversed(rueweler_counts) if value is not None), 0
-    )
+    kaleido_started = USE_PLOTLY and start_kaleido()
+    try:
+        svg = build_svg(timestamps, totals)
+    finally:
+        if kaleido_started:
+            stop_kaleido()
+    known_rueweler = rueweler_counts[~np.isnan(rueweler_counts)]
+    rueweler_current = known_rueweler[-1] if known_rueweler.size else 0
     html = build_html(totals[-1], rueweler_current, svg)
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text(html, encoding="utf-8")
+    with atomic_write(OUTPUT_PATH) as handle:
+        handle.write(html)
     print(f"HTML geschrieben nach {OUTPUT_PATH}")
 
 
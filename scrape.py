@@ -3,15 +3,28 @@ from __future__ import annotations
 
 import argparse
 import csv
-import socket
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
-from urllib.request import Request, urlopen
 from urllib.parse import quote
 
-from bs4 import BeautifulSoup
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from atomic_write import atomic_write
+
+try:
+    import lxml  # noqa: F401
+
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 BASE_URL = (
     "https://paderborner-osterlauf.r.mikatiming.com/2026/"
@@ -19,7 +32,46 @@ BASE_URL = (
 )
 DEFAULT_ENTRY = ("2025-12-20T11:51:00", 1784, 0)
 DATA_PATH = Path("data.csv")
+STATE_PATH = Path(".scrape_state.json")
 USER_AGENT = "Mozilla/5.0 (compatible; OsterlaufScraper/1.0)"
+MAX_WORKERS = 4
+REQUEST_TIMEOUT = 10
+
+# Schneller Weg ohne HTML-Baum: Klassen der <li>-Zeilen und Seitenzahlen der
+# Paginierung direkt im Quelltext suchen.
+LIST_CONTAINER_RE = re.compile(
+    r"""<div\b[^>]*?\bclass=["'](?:[^"']*\s)?pid-startlist_list(?:\s[^"']*)?["'][^>]*>""",
+    re.IGNORECASE,
+)
+DIV_TAG_RE = re.compile(r"<(/?)div\b[^>]*>", re.IGNORECASE)
+LIST_ITEM_CLASS_RE = re.compile(r"""<li\b[^>]*?\bclass=["']([^"']*)["']""", re.IGNORECASE)
+PAGINATION_RE = re.compile(
+    r"""<ul\b[^>]*?\bclass=["'][^"']*\bpagination\b[^"']*["'][^>]*>(.*?)</ul>""",
+    re.IGNORECASE | re.DOTALL,
+)
+LINK_TEXT_RE = re.compile(r"<a\b[^>]*>(.*?)</a>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+NO_RESULTS_RE = re.compile(r">\s*no results", re.IGNORECASE)
+
+CONTENT_CLASSES = {"pid-startlist_list", "pagination"}
+
+
+def is_content_class(class_value: str | list[str] | None) -> bool:
+    # Bootstrap-Elemente tragen mehrere Klassen ("col-xs-12 pid-startlist_list"),
+    # je nach bs4-Version kommt der Wert als String oder als Liste an.
+    if not class_value:
+        return False
+    classes = class_value.split() if isinstance(class_value, str) else class_value
+    return not CONTENT_CLASSES.isdisjoint(classes)
+
+
+# Nur die Teilnehmerliste und die Paginierung werden überhaupt aufgebaut;
+# Tabellen braucht nur der seltene Fallback.
+CONTENT_STRAINER = SoupStrainer(class_=is_content_class)
+TABLE_STRAINER = SoupStrainer("table")
+
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
 
 
 @dataclass
@@ -29,8 +81,53 @@ class PageResult:
     last_page: int
 
 
+def find_last_page(html: str, page: int) -> int:
+    last_page = page
+    for pagination in PAGINATION_RE.finditer(html):
+        for link in LINK_TEXT_RE.finditer(pagination.group(1)):
+            label = TAG_RE.sub("", link.group(1)).strip()
+            if label.isdigit():
+                last_page = max(last_page, int(label))
+    return last_page
+
+
+def find_list_container(html: str) -> tuple[int, int] | None:
+    # Liefert den Inhalt des Listen-<div> bis zu seinem schließenden Tag, damit
+    # spätere Listen (z. B. im Footer) nicht mitgezählt werden.
+    opening = LIST_CONTAINER_RE.search(html)
+    if opening is None:
+        return None
+    depth = 1
+    for tag in DIV_TAG_RE.finditer(html, opening.end()):
+        depth += -1 if tag.group(1) else 1
+        if depth == 0:
+            return opening.end(), tag.start()
+    return opening.end(), len(html)
+
+
+def count_list_rows(html: str, start: int, end: int) -> int:
+    count = 0
+    for match in LIST_ITEM_CLASS_RE.finditer(html, start, end):
+        classes = match.group(1).split()
+        if "list-group-header" in classes:
+            continue
+        if "list-group-item" in classes and "row" in classes:
+            count += 1
+    return count
+
+
 def parse_page(html: str, page: int) -> PageResult:
-    soup = BeautifulSoup(html, "html.parser")
+    container = find_list_container(html)
+    count = count_list_rows(html, *container) if container else 0
+    if count and not NO_RESULTS_RE.search(html, *container):
+        last_page = find_last_page(html, page)
+        return PageResult(page=page, participant_count=count, last_page=last_page)
+    # Leere Listen, "No results" und Tabellen-Layouts prüft weiterhin BeautifulSoup.
+    return parse_page_soup(html, page)
+
+
+def parse_page_soup(html: str, page: int) -> PageResult:
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=CONTENT_STRAINER)
     container = soup.find("div", class_="pid-startlist_list")
     last_page = page
     pagination = soup.find("ul", class_="pagination")
@@ -49,7 +146,7 @@ def parse_page(html: str, page: int) -> PageResult:
         ]
         if rows:
             return PageResult(page=page, participant_count=len(rows), last_page=last_page)
-    table = soup.find("table")
+    table = BeautifulSoup(html, HTML_PARSER, parse_only=TABLE_STRAINER).find("table")
     if table is None:
         return PageResult(page=page, participant_count=0, last_page=last_page)
     rows = table.find_all("tr")
@@ -59,10 +156,9 @@ def parse_page(html: str, page: int) -> PageResult:
 
 def fetch_page_html(page: int, url_template: str) -> str:
     url = url_template.format(page=page)
-    request = Request(url, headers={"User-Agent": USER_AGENT})
-    socket.setdefaulttimeout(10)
-    with urlopen(request, timeout=10) as response:
-        return response.read().decode("utf-8", errors="ignore")
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.content.decode("utf-8", errors="ignore")
 
 
 def fetch_page_participants(page: int, url_template: str) -> PageResult:
@@ -70,6 +166,7 @@ def fetch_page_participants(page: int, url_template: str) -> PageResult:
     return parse_page(html, page)
 
 
+@lru_cache(maxsize=128)
 def build_name_url_template(name: str) -> str:
     encoded_name = quote(name)
     return (
@@ -79,35 +176,8 @@ def build_name_url_template(name: str) -> str:
     )
 
 
-def load_entries(path: Path) -> list[tuple[str, int, int | None]]:
-    if not path.exists() or path.stat().st_size == 0:
-        return [DEFAULT_ENTRY]
-
-    entries: list[tuple[str, int, int | None]] = []
-    with path.open(newline="", encoding="utf-8") as handle:
-        reader = csv.reader(handle)
-        for row in reader:
-            if len(row) < 2:
-                continue
-            timestamp = row[0].strip()
-            try:
-                count = int(row[1])
-            except ValueError:
-                continue
-            rueweler_count: int | None = None
-            if len(row) >= 3 and row[2].strip():
-                try:
-                    rueweler_count = int(row[2])
-                except ValueError:
-                    rueweler_count = None
-            if timestamp:
-                entries.append((timestamp, count, rueweler_count))
-
-    return entries or [DEFAULT_ENTRY]
-
-
 def write_entries(path: Path, entries: Iterable[tuple[str, int, int | None]]) -> None:
-    with path.open("w", newline="", encoding="utf-8") as handle:
+    with atomic_write(path, newline="") as handle:
         writer = csv.writer(handle)
         for timestamp, total, rueweler_count in entries:
             row = [timestamp, total]
@@ -115,25 +185,83 @@ def write_entries(path: Path, entries: Iterable[tuple[str, int, int | None]]) ->
             writer.writerow(row)
 
 
-def find_total_participants(url_template: str) -> int:
+def append_entry(path: Path, entry: tuple[str, int, int | None]) -> None:
+    if not path.exists() or path.stat().st_size == 0:
+        write_entries(path, [DEFAULT_ENTRY, entry])
+        return
+    with path.open("a", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        timestamp, total, rueweler_count = entry
+        writer.writerow([timestamp, total, "" if rueweler_count is None else rueweler_count])
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def load_state(path: Path) -> dict[str, dict[str, int]]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(path: Path, state: dict[str, dict[str, int]]) -> None:
+    with atomic_write(path) as handle:
+        handle.write(json.dumps(state, indent=2, sort_keys=True) + "\n")
+
+
+def walk_to_last_page(result: PageResult, url_template: str) -> PageResult:
+    # Die Paginierung zeigt nur ein Fenster um die aktuelle Seite, daher so
+    # lange weiterspringen, bis keine höhere Seite mehr verlinkt ist.
+    while result.participant_count and result.last_page > result.page:
+        result = fetch_page_participants(result.last_page, url_template)
+    return result
+
+
+def find_total_participants(
+    url_template: str, state: dict[str, dict[str, int]] | None = None
+) -> int:
+    cached = state.get(url_template) if state is not None else None
+    if cached:
+        page_size = cached["page_size"]
+        last_page_result = walk_to_last_page(
+            fetch_page_participants(cached["last_page"], url_template), url_template
+        )
+        if last_page_result.participant_count > 0:
+            cached["last_page"] = last_page_result.last_page
+            return (
+                (last_page_result.last_page - 1) * page_size
+                + last_page_result.participant_count
+            )
+
     first_page = fetch_page_participants(1, url_template)
+    if state is not None:
+        state.pop(url_template, None)
     if first_page.participant_count == 0:
         return 0
     if first_page.last_page <= 1:
         return first_page.participant_count
 
-    last_page_result = fetch_page_participants(first_page.last_page, url_template)
     page_size = first_page.participant_count
+    last_page_result = walk_to_last_page(first_page, url_template)
+    if state is not None:
+        state[url_template] = {
+            "page_size": page_size,
+            "last_page": last_page_result.last_page,
+        }
     return (last_page_result.last_page - 1) * page_size + last_page_result.participant_count
 
 
-def find_participants_for_name(name: str) -> int:
+def find_participants_for_name(
+    name: str, state: dict[str, dict[str, int]] | None = None
+) -> int:
     url_template = build_name_url_template(name)
-    count = find_total_participants(url_template)
+    count = find_total_participants(url_template, state)
     if count == 0 and " " not in name and len(name) > 1:
         fallback_name = name[1:]
         fallback_template = build_name_url_template(fallback_name)
-        fallback_count = find_total_participants(fallback_template)
+        fallback_count = find_total_participants(fallback_template, state)
         if fallback_count > 0:
             return fallback_count
     return count
@@ -146,8 +274,10 @@ def run_tests() -> None:
         "sch": 198,
     }
 
-    for name, expected in expectations.items():
-        result = find_participants_for_name(name)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(find_participants_for_name, expectations)
+
+    for (name, expected), result in zip(expectations.items(), results):
         assert (
             result == expected
         ), f"Erwartet {expected} für {name!r}, erhalten {result}"
@@ -155,14 +285,18 @@ def run_tests() -> None:
 
 
 def main() -> None:
-    entries = load_entries(DATA_PATH)
-    total_participants = find_total_participants(BASE_URL)
-
-    rueweler_participants = find_participants_for_name("rüweler")
+    state = load_state(STATE_PATH)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        total_future = executor.submit(find_total_participants, BASE_URL, state)
+        rueweler_future = executor.submit(
+            find_participants_for_name, "rüweler", state
+        )
+        total_participants = total_future.result()
+        rueweler_participants = rueweler_future.result()
 
     timestamp = datetime.now().isoformat(timespec="seconds")
-    entries.append((timestamp, total_participants, rueweler_participants))
-    write_entries(DATA_PATH, entries)
+    append_entry(DATA_PATH, (timestamp, total_participants, rueweler_participants))
+    write_state(STATE_PATH, state)
 
 
 if __name__ == "__main__":
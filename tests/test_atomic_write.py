@@ -0,0 +1,23 @@
+import pytest
+
+from atomic_write import atomic_write
+
+
+def test_replaces_target_and_removes_temp_file(tmp_path):
+    target = tmp_path / "data.csv"
+    target.write_text("alt\n", encoding="utf-8")
+    with atomic_write(target) as handle:
+        handle.write("neu\n")
+    assert target.read_text(encoding="utf-8") == "neu\n"
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_failed_write_keeps_previous_content(tmp_path):
+    target = tmp_path / "data.csv"
+    target.write_text("alt\n", encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with atomic_write(target) as handle:
+            handle.write("halb")
+            raise RuntimeError("Abbruch")
+    assert target.read_text(encoding="utf-8") == "alt\n"
+    assert list(tmp_path.iterdir()) == [target]
@@ -0,0 +1,74 @@
+import sys
+
+import numpy as np
+import pytest
+
+import render
+
+
+def plateau_series(seed: int, n: int) -> tuple[np.ndarray, np.ndarray]:
+    # Wie data.csv: stündliche Zeitstempel, ganzzahlige Werte mit langen Plateaus.
+    rng = np.random.default_rng(seed)
+    steps = rng.integers(0, 2, n) * rng.integers(0, 5, n)
+    values = (2000 + np.cumsum(steps)).astype(float)
+    offsets = np.cumsum(rng.integers(2900, 3100, n)).astype("timedelta64[s]")
+    timestamps = (np.datetime64("2025-12-20T11:51:00") + offsets).astype("datetime64[us]")
+    return timestamps, values
+
+
+def as_offsets(timestamps: np.ndarray) -> np.ndarray:
+    x = timestamps.astype("datetime64[ns]").astype(np.int64)
+    return (x - x[0]).astype(float)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("n", [502, 5000])
+def test_lttb_implementations_agree_on_plateaus(seed, n):
+    timestamps, values = plateau_series(seed, n)
+    x = as_offsets(timestamps)
+    expected = render.lttb_indices(x, values, 500)
+    np.testing.assert_array_equal(render.lttb_loop(x, values, 500), expected)
+    python_loop = getattr(render.lttb_loop, "py_func", render.lttb_loop)
+    np.testing.assert_array_equal(python_loop(x, values, 500), expected)
+
+
+def test_downsample_keeps_endpoints_and_short_series():
+    timestamps, values = plateau_series(0, 2000)
+    sampled_ts, sampled_values = render.downsample(timestamps, values)
+    assert len(sampled_ts) == render.MAX_CHART_POINTS
+    assert sampled_ts[0] == timestamps[0] and sampled_ts[-1] == timestamps[-1]
+    assert np.all(np.diff(sampled_ts.astype(np.int64)) > 0)
+    short_ts, short_values = render.downsample(timestamps[:300], values[:300])
+    np.testing.assert_array_equal(short_ts, timestamps[:300])
+    np.testing.assert_array_equal(short_values, values[:300])
+
+
+def test_start_kaleido_without_kaleido_installed(monkeypatch):
+    monkeypatch.setitem(sys.modules, "kaleido", None)
+    assert render.start_kaleido() is False
+
+
+def test_load_series_parses_mixed_iso_formats(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(
+        "2025-12-21T11:51:00.123456,1801,\r\n2025-12-20T11:51:00,1784,0\r\n",
+        encoding="utf-8",
+    )
+    timestamps, totals, rueweler = render.load_series(path)
+    assert timestamps.dtype.kind == "M"
+    np.testing.assert_array_equal(totals, [1784.0, 1801.0])
+    assert rueweler[0] == 0 and np.isnan(rueweler[1])
+
+
+def test_load_series_rejects_invalid_timestamps(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("2025-12-20T11:51:00,1784,0\r\ngestern,1801,\r\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        render.load_series(path)
+
+
+def test_load_series_rejects_missing_total(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("2025-12-20T11:51:00,1784,0\r\n2025-12-21T11:51:00,,0\r\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="ohne Gesamtzahl"):
+        render.load_series(path)
@@ -0,0 +1,181 @@
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+import scrape
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def parse_unstrained(html: str) -> tuple[int, int]:
+    # Referenz: derselbe Abgleich wie parse_page_soup, aber auf dem vollen Baum.
+    soup = BeautifulSoup(html, scrape.HTML_PARSER)
+    container = soup.find("div", class_="pid-startlist_list")
+    rows = [
+        row
+        for row in container.select("li.list-group-item.row")
+        if "list-group-header" not in row.get("class")
+    ]
+    pagination = soup.find("ul", class_="pagination")
+    labels = [link.get_text(strip=True) for link in pagination.find_all("a")]
+    return len(rows), max(int(label) for label in labels if label.isdigit())
+
+
+def test_soup_parser_handles_multi_class_elements():
+    html = load_fixture("startlist_full.html")
+    result = scrape.parse_page_soup(html, 1)
+    assert (result.participant_count, result.last_page) == parse_unstrained(html)
+    assert (result.participant_count, result.last_page) == (25, 117)
+
+
+@pytest.mark.parametrize(
+    "class_value",
+    ["pid-startlist_list", "col-xs-12 pid-startlist_list", ["pagination", "hidden-xs"]],
+)
+def test_content_class_matches_any_token(class_value):
+    assert scrape.is_content_class(class_value)
+
+
+@pytest.mark.parametrize("class_value", [None, "", "list-group", "pagination-info"])
+def test_content_class_rejects_other_classes(class_value):
+    assert not scrape.is_content_class(class_value)
+
+
+def test_soup_parser_table_layout():
+    result = scrape.parse_page_soup(load_fixture("startlist_table.html"), 3)
+    assert (result.participant_count, result.last_page) == (12, 4)
+
+
+@pytest.mark.parametrize(
+    ("fixture", "page", "expected"),
+    [
+        ("startlist_full.html", 1, (25, 117)),
+        ("startlist_last.html", 117, (7, 117)),
+        ("startlist_no_results.html", 1, (0, 1)),
+        ("startlist_table.html", 3, (12, 4)),
+    ],
+)
+def test_regex_parser_matches_soup_parser(fixture, page, expected):
+    html = load_fixture(fixture)
+    result = scrape.parse_page(html, page)
+    reference = scrape.parse_page_soup(html, page)
+    assert (result.participant_count, result.last_page) == expected
+    assert (reference.participant_count, reference.last_page) == expected
+
+
+def test_row_count_stops_at_list_container():
+    # Die Fixture enthält nach der Liste noch ein list-group-item im Footer.
+    html = load_fixture("startlist_full.html")
+    start, end = scrape.find_list_container(html)
+    assert "footer" in html[end:]
+    assert scrape.count_list_rows(html, start, end) == 25
+
+
+def make_page(page: int, total: int, counter: str = "") -> str:
+    # Startlisten-Seite im Aufbau der Fixtures: Titel und Navigation enthalten
+    # "2026" und "Teilnehmer", die Paginierung zeigt ein Fenster plus Seite 1.
+    last_page = -(-total // 25)
+    rows = max(0, min(25, total - (page - 1) * 25))
+    shown = {1, *range(max(1, page - 2), min(last_page, page + 2) + 1)}
+    links = "".join(
+        f'<li><a href="?page={p}&amp;event=10"><span>{p}</span></a></li>'
+        for p in sorted(shown)
+    )
+    items = '<li class="list-group-item row"><div class="col-xs-6">Name</div></li>' * rows
+    return (
+        "<html><head><title>Paderborner Osterlauf 2026</title></head><body>"
+        '<nav><ul class="nav"><li><a href="/2026/">Osterlauf 2026</a></li> '
+        '<li><a href="?pid=startlist">Teilnehmer</a></li></ul></nav>'
+        f'<div class="col-xs-12 pid-startlist_list">{counter}'
+        f'<ul class="list-group">{items}</ul>'
+        f'<ul class="pagination hidden-xs">{links}</ul></div></body></html>'
+    )
+
+
+@pytest.mark.parametrize(
+    "counter",
+    [
+        "",
+        '<div class="list-info">Treffer: 2026</div>',
+        '<div class="list-info">Treffer: 9999</div>',
+    ],
+)
+def test_total_and_requests_come_from_pagination(monkeypatch, counter):
+    # 2040 Teilnehmer auf 82 Seiten. Ein Trefferzähler im Seitenkopf, ob er zu
+    # wenig oder zu viel meldet, ändert weder die Summe noch die Abrufe.
+    fetched = []
+
+    def fake_fetch(page, url_template):
+        fetched.append(page)
+        return make_page(page, 2040, counter)
+
+    monkeypatch.setattr(scrape, "fetch_page_html", fake_fetch)
+    state = {}
+    assert scrape.find_total_participants("u", state) == 2040
+    assert fetched == [1, *range(3, 82, 2), 82]
+    assert state["u"] == {"page_size": 25, "last_page": 82}
+    fetched.clear()
+    assert scrape.find_total_participants("u", state) == 2040
+    assert fetched == [82]
+
+
+@pytest.mark.parametrize(
+    ("total", "expected_state"),
+    [(60, {"u": {"page_size": 25, "last_page": 3}}), (20, {})],
+)
+def test_empty_cached_page_falls_back_to_first_page(monkeypatch, total, expected_state):
+    # Die Liste ist seit dem letzten Lauf geschrumpft: Seite 82 ist jetzt leer.
+    fetched = []
+
+    def fake_fetch(page, url_template):
+        fetched.append(page)
+        return make_page(page, total)
+
+    monkeypatch.setattr(scrape, "fetch_page_html", fake_fetch)
+    state = {"u": {"page_size": 25, "last_page": 82}}
+    assert scrape.find_total_participants("u", state) == total
+    assert fetched[:2] == [82, 1]
+    assert state == expected_state
+
+
+def test_load_state_missing_or_corrupt_file(tmp_path):
+    path = tmp_path / ".scrape_state.json"
+    assert scrape.load_state(path) == {}
+    path.write_text('{"u": {"page_size": 25,', encoding="utf-8")
+    assert scrape.load_state(path) == {}
+
+
+def test_state_round_trip(tmp_path):
+    path = tmp_path / ".scrape_state.json"
+    state = {"u": {"page_size": 25, "last_page": 82}}
+    scrape.write_state(path, state)
+    assert scrape.load_state(path) == state
+
+
+def test_append_entry_adds_one_row(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(b"2025-12-20T11:51:00,1784,\r\n")
+    scrape.append_entry(path, ("2025-12-20T16:36:04", 1801, None))
+    scrape.append_entry(path, ("2025-12-20T18:26:03", 1805, 2))
+    assert path.read_bytes() == (
+        b"2025-12-20T11:51:00,1784,\r\n"
+        b"2025-12-20T16:36:04,1801,\r\n"
+        b"2025-12-20T18:26:03,1805,2\r\n"
+    )
+
+
+@pytest.mark.parametrize("existing", [None, b""])
+def test_append_entry_seeds_default_entry(tmp_path, existing):
+    path = tmp_path / "data.csv"
+    if existing is not None:
+        path.write_bytes(existing)
+    scrape.append_entry(path, ("2026-01-05T10:00:00", 2950, 1))
+    timestamp, total, rueweler = scrape.DEFAULT_ENTRY
+    assert path.read_bytes() == (
+        f"{timestamp},{total},{rueweler}\r\n2026-01-05T10:00:00,2950,1\r\n".encode()
+    )